@@ -18,12 +18,309 @@
 # [1] Billtrust documentation. https://api-docs.aws-prod.billtrust.com/
 #
 
+#
+# Logging:
+# Errors are reported through the standard logging module. Each record
+# already carries its source location, so a caller that wants it can
+# configure a format such as
+#
+#    logging.basicConfig(format='%(asctime)s %(levelname)s %(name)s '
+#                               '%(filename)s:%(lineno)d %(funcName)s %(message)s')
+#
+
 import requests
+from requests import certs
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sys
 import json
 import os
-from inspect import currentframe, getframeinfo
 import logging
+import asyncio
+import ssl
+import threading
+import time
+import types
+from functools import lru_cache
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard json module
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # only needed for the *_async functions
+    httpx = None
+
+
+#
+# Shared HTTP session
+#
+# All of the calls below go to the same host, so a single Session lets
+# urllib3 keep the TCP/TLS connection open between requests instead of
+# paying for a new handshake on every call. Retries only apply to
+# idempotent methods on gateway errors. Once retries run out the last
+# response is returned, so raise_for_status() still raises HTTPError.
+# The pool is sized to cover the worker threads used by the *_many()
+# functions.
+#
+
+_POOL_MAXSIZE = 32
+
+# One TLS context for every connection, so the CA bundle is loaded once
+# rather than for each new socket. TLS 1.3 is negotiated whenever the
+# server offers it.
+_SSL_CONTEXT = ssl.create_default_context(cafile=certs.where())
+
+
+class _TLSAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = _SSL_CONTEXT
+        return super().init_poolmanager(*args, **kwargs)
+
+
+# Headers shared by every call. Accept is set on the session itself, so
+# most calls only add their X-Billtrust-Auth token; calls that send a
+# body merge in _JSON_HEADERS. Read-only, since they are shared.
+_JSON_ACCEPT = types.MappingProxyType({"Accept":"application/json"})
+_JSON_HEADERS = types.MappingProxyType({"Accept":"application/json", "Content-Type":"application/json"})
+
+_SESSION = requests.Session()
+_SESSION.headers.update(_JSON_ACCEPT)
+_SESSION.mount("https://", _TLSAdapter(pool_connections=1, pool_maxsize=_POOL_MAXSIZE,
+                                       max_retries=Retry(total=3, backoff_factor=0.2,
+                                                         status_forcelist=[502, 503, 504],
+                                                         raise_on_status=False)))
+
+
+#########################################################################
+#
+# Function: _endpoints()
+#
+# Parameters:
+#    tenant_id : tenant id (str)
+#
+# Returns:
+#    namespace of URL builders for the tenant's collections endpoints:
+#       customers()                  collection customer list
+#       customer(account_number)     customer master record
+#       contacts(account_number)     contacts on an account
+#       contacts_bulk(account_number)
+#                                    batch insert of contacts
+#       contact(account_number, contact_id)
+#                                    a single contact
+#
+# Comments:
+#    Cached per tenant, so loops over many rows only build the tenant
+#    prefix once. Every id placed in the path is escaped with
+#    _segment().
+#
+#########################################################################
+
+@lru_cache(maxsize=None)
+def _endpoints(tenant_id):
+    base = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{_segment(tenant_id)}"
+    customers = f"{base}/collectioncustomers"
+
+    return types.SimpleNamespace(
+        customers=lambda: customers,
+        customer=lambda account_number: f"{base}/customermasters/customernumber/{_segment(account_number)}",
+        contacts=lambda account_number: f"{customers}/accountNumber/{_segment(account_number)}/collectioncontacts",
+        contacts_bulk=lambda account_number: f"{customers}/accountNumber/{_segment(account_number)}/collectioncontacts/bulk",
+        contact=lambda account_number, contact_id: f"{customers}/accountNumber/{_segment(account_number)}/collectioncontacts/{_segment(contact_id)}")
+
+
+#########################################################################
+#
+# Function: _segment()
+#
+# Parameters:
+#    value : value to place in a URL path (str)
+#
+# Returns:
+#    value percent-encoded as a single path segment, so characters such
+#    as "/", "#", "?" and "'" cannot change the shape of the URL
+#
+#########################################################################
+
+def _segment(value) -> str :
+    return quote(str(value), safe='')
+
+
+#########################################################################
+#
+# Function: _json()
+#
+# Parameters:
+#    response : requests.Response or httpx.Response to decode
+#
+# Returns:
+#    decoded JSON body of the response
+#
+# Comments:
+#    Uses orjson when it is installed, which is several times faster
+#    than the standard library on large list responses.
+#
+#########################################################################
+
+def _json(response):
+    if orjson is None :
+        return response.json()
+    return orjson.loads(response.content)
+
+
+#########################################################################
+#
+# Function: _dumps()
+#
+# Parameters:
+#    body : request body to encode (dict or list)
+#
+# Returns:
+#    bytes with the JSON encoded body
+#
+#########################################################################
+
+def _dumps(body) -> bytes :
+    if orjson is None :
+        return json.dumps(body).encode("utf-8")
+    return orjson.dumps(body)
+
+
+#
+# Contact index cache
+#
+# Maps (tenant_id, account_number) to a dict with
+#    etag, last_modified : validators from the last contact list response
+#    contacts : the contact list itself
+#    index : {(firstName, lastName): id}, built on first lookup
+# get_contacts_for_account() fills it and revalidates it with a
+# conditional GET. Functions that add, change or remove contacts drop
+# the account's entry through _invalidate_contacts().
+#
+
+_contact_index_cache = {}
+
+
+#
+# Token cache
+#
+# Maps email to (access token, expiry time) for get_token(). Guarded by
+# _TOKEN_LOCK so that threads sharing a login only authenticate once.
+#
+
+_TOKEN_CACHE = {}
+_TOKEN_LOCK = threading.Lock()
+
+
+#
+# Prepared request templates
+#
+# contact_update() and contact_delete() run in tight loops, so they
+# prepare their request once per method and copy it for each call
+# instead of running the session's full prepare_request() step every
+# time. The token, URL, body and cookies are filled in per call, so the
+# cache never holds more than one entry per method. See _prepared().
+#
+
+_PREPARED_TEMPLATES = {}
+
+
+#
+# Bulk contact endpoint
+#
+# Tenants whose server has shown it has no bulk endpoint: it answered
+# 405, or 404 for an account whose contact list loads. For these,
+# add_contacts_to_account_bulk() goes straight to one POST per contact.
+# A 404 for an unknown account does not count.
+#
+
+_bulk_contacts_unsupported = set()
+
+
+#########################################################################
+#
+# Function: close()
+#
+# Parameters:
+#    none
+#
+# Returns:
+#    nothing
+#
+# Comments:
+#    Closes the pooled connections held by the shared session. The
+#    session reopens connections on the next call, so it is safe to
+#    keep using the library afterwards.
+#
+#########################################################################
+
+def close():
+    _SESSION.close()
+    return
+
+
+#########################################################################
+#
+# Function: _prepared()
+#
+# Parameters:
+#    method : HTTP method (str)
+#    access_token : access token for session (str)
+#    url : target URL (str)
+#    body : request body to send as JSON, or None (dict or list)
+#
+# Returns:
+#    requests.PreparedRequest ready for _send()
+#
+#########################################################################
+
+def _prepared(method, access_token, url, body=None):
+    template_key = (method, body is not None)
+    template = _PREPARED_TEMPLATES.get(template_key)
+    if template is None :
+        headers = _JSON_HEADERS if body is not None else {}
+        template = _SESSION.prepare_request(requests.Request(method, url=url, headers=headers))
+        # Cookies change over the session's life, so they are applied per call
+        template.headers.pop("Cookie", None)
+        _PREPARED_TEMPLATES[template_key] = template
+
+    prepared = template.copy()
+    prepared.prepare_url(url, None)
+    prepared.headers["X-Billtrust-Auth"] = access_token
+    prepared.prepare_cookies(_SESSION.cookies)
+    if body is not None :
+        prepared.body = _dumps(body)
+        prepared.headers["Content-Length"] = str(len(prepared.body))
+
+    return prepared
+
+
+#########################################################################
+#
+# Function: _send()
+#
+# Parameters:
+#    prepared : requests.PreparedRequest from _prepared()
+#
+# Returns:
+#    requests.Response
+#
+# Comments:
+#    Applies the same environment settings as the session's own
+#    request methods (proxies, REQUESTS_CA_BUNDLE, ...), which
+#    Session.send() alone skips.
+#
+#########################################################################
+
+def _send(prepared):
+    settings = _SESSION.merge_environment_settings(prepared.url, {}, None, None, None)
+    return _SESSION.send(prepared, **settings)
 
 
 #########################################################################
@@ -48,11 +345,11 @@ import logging
 
 def login(email, password) -> str :
     login_uri = "https://arc-aegis.billtrust.com/authentication/v1/login"
-    login_headers = {"Accept":"application/json", "Content-Type":"application/json"}
+    login_headers = _JSON_HEADERS
     login_request = {"email":email, "password":password}
-    login_response = requests.post(login_uri, json=login_request, headers=login_headers)
+    login_response = _SESSION.post(login_uri, data=_dumps(login_request), headers=login_headers)
     login_response.raise_for_status()
-    login_resp_json = login_response.json()
+    login_resp_json = _json(login_response)
 
     return login_resp_json["accessToken"]
 
@@ -78,13 +375,61 @@ def login(email, password) -> str :
 
 def logout(access_token):
     logout_uri = "https://arc-aegis.billtrust.com/authentication/v1/logout"
-    logout_headers = {"Accept":"application/json", "Content-Type":"application/json"}
+    logout_headers = _JSON_HEADERS
     logout_request = {'accessToken':access_token}
-    logout_response = requests.post(logout_uri, json=logout_request, headers=logout_headers)
+    logout_response = _SESSION.post(logout_uri, data=_dumps(logout_request), headers=logout_headers)
     logout_response.raise_for_status()
+
+    with _TOKEN_LOCK:
+        for email in [email for email, (token, expiry) in _TOKEN_CACHE.items() if token == access_token]:
+            _TOKEN_CACHE.pop(email, None)
+
+    close()
     return
 
 
+#########################################################################
+#
+# Function: get_token()
+#
+# Parameters:
+#    email : email address of account (str)
+#    password : password for the account (str)
+#    ttl : seconds to reuse a token before logging in again (int)
+#    refresh : discard any cached token and log in again (bool)
+#
+# Returns:
+#    accessToken for session
+#
+# Comments:
+#    Use in place of login() when several operations run with the same
+#    credentials. A cached token is returned until its ttl expires, so
+#    keep ttl below the token lifetime.
+#
+#    The functions that raise on errors surface a 401 as an exception:
+#    requests.HTTPError from the get_* functions and
+#    httpx.HTTPStatusError from the *_async functions. On one of those,
+#    call get_token() once with refresh=True and retry.
+#    add_contact_to_account(), contact_update() and contact_delete()
+#    log failures instead of raising, so a 401 from them is not visible
+#    to the caller.
+#
+#    logout() removes the token from the cache.
+#
+#########################################################################
+
+def get_token(email, password, ttl=3000, refresh=False) -> str :
+    with _TOKEN_LOCK:
+        cached = _TOKEN_CACHE.get(email)
+        if cached is not None and not refresh and time.time() < cached[1] :
+            return cached[0]
+
+        access_token = login(email, password)
+        _TOKEN_CACHE[email] = (access_token, time.time() + ttl)
+
+    return access_token
+
+
 #########################################################################
 #
 # Function: get_users_for_tenant()
@@ -107,11 +452,55 @@ def logout(access_token):
 
 def get_users_for_tenant(access_token, tenant_id) -> json :
     users_uri = f"https://arc-aegis.billtrust.com/user/v1/tenants/{tenant_id}/users"
-    users_headers = {"Accept":"application/json", "X-Billtrust-Auth":access_token}
-    users_response = requests.get(users_uri, headers=users_headers)
+    users_headers = {"X-Billtrust-Auth":access_token}
+    users_response = _SESSION.get(users_uri, headers=users_headers)
     users_response.raise_for_status()
     
-    return users_response.json()
+    return _json(users_response)
+
+
+#########################################################################
+#
+# Function: iter_accounts_for_tenant()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    page_size : number of accounts to request per page (int)
+#
+# Returns:
+#    generator yielding one account (json) at a time
+#
+# Comments:
+#    Accounts are requested a page at a time, so only one page is held
+#    in memory and the caller can start work before the last page
+#    arrives.
+#
+# See also:
+#    Billtrust Python Code Samples
+#    https://api-docs.aws-prod.billtrust.com/examples/python/
+#
+# TODO:
+#    - Adding logging
+#
+#########################################################################
+
+def iter_accounts_for_tenant(access_token, tenant_id, page_size=1000):
+    accounts_uri = _endpoints(tenant_id).customers()
+    accounts_headers = {"X-Billtrust-Auth":access_token}
+    page = 1
+
+    while True :
+        accounts_response = _SESSION.get(accounts_uri, headers=accounts_headers,
+                                         params={"page": page, "pageSize": page_size})
+        accounts_response.raise_for_status()
+        accounts_page = _json(accounts_response)
+
+        yield from accounts_page
+
+        if len(accounts_page) < page_size :
+            return
+        page += 1
 
 
 #########################################################################
@@ -125,6 +514,10 @@ def get_users_for_tenant(access_token, tenant_id) -> json :
 # Returns:
 #    json with a list of accounts
 #
+# Comments:
+#    Loads every account into memory. Use iter_accounts_for_tenant()
+#    for large tenants.
+#
 # See also:
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
@@ -135,12 +528,37 @@ def get_users_for_tenant(access_token, tenant_id) -> json :
 #########################################################################
 
 def get_accounts_for_tenant(access_token, tenant_id) -> json :
-    accounts_uri = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{tenant_id}/collectioncustomers?page=1&pageSize=100000"
-    accounts_headers = {"Accept":"application/json", "X-Billtrust-Auth":access_token}
-    accounts_response = requests.get(accounts_uri, headers=accounts_headers)
-    accounts_response.raise_for_status()
-    
-    return accounts_response.json()
+    return list(iter_accounts_for_tenant(access_token, tenant_id))
+
+
+#########################################################################
+#
+# Function: _invalidate_contacts()
+#
+# Parameters:
+#    tenant_id : tenant id (str)
+#    account_number : customer account number (not Billtrust accountid) (str)
+#
+# Returns:
+#    nothing
+#
+# Comments:
+#    Called after a successful write to the account's contacts. The
+#    entry is always dropped: a Last-Modified with one-second precision
+#    or a weak ETag can still earn a 304 right after the write, which
+#    would hand back the list from before it.
+#
+#########################################################################
+
+def _invalidate_contacts(tenant_id, account_number):
+    _contact_index_cache.pop((tenant_id, account_number), None)
+    return
+    if entry["etag"] or entry["last_modified"] :
+        entry["index"] = None
+    else :
+        _contact_index_cache.pop(cache_key, None)
+
+    return
 
 
 #########################################################################
@@ -155,6 +573,12 @@ def get_accounts_for_tenant(access_token, tenant_id) -> json :
 # Returns:
 #    json with a list of contacts
 #
+# Comments:
+#    The list is cached per account. Later calls send If-None-Match /
+#    If-Modified-Since, and a 304 Not Modified answer returns the cached
+#    list without downloading or decoding it again. A new list is
+#    returned on every call, so callers may modify it freely.
+#
 # See also:
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
@@ -164,13 +588,161 @@ def get_accounts_for_tenant(access_token, tenant_id) -> json :
 #
 #########################################################################
 
-def get_contacts_for_account(access_token, tenant_id, account_number) -> json :
-    contacts_uri = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{tenant_id}/collectioncustomers/accountnumber/{account_number}/collectioncontacts"
-    contacts_headers = {"Accept":"application/json", "Content-Type": "application/json", "X-Billtrust-Auth":access_token}
-    contacts_response = requests.get(contacts_uri, headers=contacts_headers)
-    contacts_response.raise_for_status()
+def get_contacts_for_account(access_token, tenant_id, account_number) -> json :
+    return list(_fetch_contacts(access_token, tenant_id, account_number)["contacts"])
+
+
+#########################################################################
+#
+# Function: _fetch_contacts()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    account_number : customer account number (not Billtrust accountid) 
+#
+# Returns:
+#    the account's contact cache entry after fetching or revalidating
+#    it (dict). Callers use the returned entry rather than reading
+#    _contact_index_cache again, since another thread may replace or
+#    drop the cached one at any time.
+#
+#########################################################################
+
+def _fetch_contacts(access_token, tenant_id, account_number) -> dict :
+    cache_key = (tenant_id, account_number)
+    cached = _contact_index_cache.get(cache_key)
+
+    contacts_uri = _endpoints(tenant_id).contacts(account_number)
+    contacts_headers = {"X-Billtrust-Auth":access_token}
+    if cached is not None :
+        if cached["etag"] :
+            contacts_headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"] :
+            contacts_headers["If-Modified-Since"] = cached["last_modified"]
+
+    contacts_response = _SESSION.get(contacts_uri, headers=contacts_headers)
+    if contacts_response.status_code == 304 and cached is not None :
+        return cached
+    contacts_response.raise_for_status()
+
+    entry = {"etag": contacts_response.headers.get("ETag"),
+             "last_modified": contacts_response.headers.get("Last-Modified"),
+             "contacts": _json(contacts_response),
+             "index": None}
+    _contact_index_cache[cache_key] = entry
+
+    return entry
+
+
+#########################################################################
+#
+# Function: _contact_body()
+#
+# Parameters:
+#    See add_contact_to_account()
+#
+# Returns:
+#    dict with the request body for a new contact
+#
+#########################################################################
+
+def _contact_body(first_name, last_name, language, timezone, notes, email, officePhone,
+                  cellPhone, fax, title, address1, address2, includeInCorrespondence) -> dict :
+
+    if len(language) < 2 :
+        language = 'en'
+
+    if len(timezone) < 4 :
+        timezone = 'America/Chicago'
+
+    return {"firstName": first_name,
+            "lastName": last_name,
+            "language": language,
+            "notes": notes,
+            "email": email,
+            "officePhone": officePhone,
+            "cellPhone": cellPhone,
+            "fax": fax,
+            "title": title,
+            "address1": address1,
+            "address2": address2,
+            "timezone": timezone,
+            "IncludeInCorrespondence": includeInCorrespondence}
+
+
+#########################################################################
+#
+# Function: _as_bool()
+#
+# Parameters:
+#    value : flag as passed in or as read back from the API
+#            (bool or str)
+#
+# Returns:
+#    bool, treating "true", "yes", "y" and "1" (any case) as True
+#
+#########################################################################
+
+def _as_bool(value) -> bool :
+    if isinstance(value, str) :
+        return value.strip().lower() in ("true", "yes", "y", "1")
+    return bool(value)
+
+
+#########################################################################
+#
+# Function: _contact_update_body()
+#
+# Parameters:
+#    See contact_update()
+#    current : contact as returned by get_contacts_for_account(), or
+#              None to replace every field (dict)
+#
+# Returns:
+#    list with the JSON-Patch operations for a contact update. Fields
+#    whose value already matches current are left out.
+#
+#########################################################################
+
+def _contact_update_body(first_name, last_name, language, timezone, notes, email, officePhone,
+                         cellPhone, fax, title, address1, address2, city, state, zip, country,
+                         includeInCorrespondence, current=None) -> list :
+
+    if len(language) < 2 :
+        language = 'en'
 
-    return contacts_response.json()
+    if len(timezone) < 4 :
+        timezone = 'America/Chicago'
+
+    # (patch path, key in the contact as read back, new value)
+    update_fields = (("FirstName",              "firstName",               first_name),
+                     ("LastName",               "lastName",                last_name),
+                     ("Language",               "language",                language),
+                     ("Notes",                  "notes",                   notes),
+                     ("Email",                  "email",                   email),
+                     ("OfficePhone",            "officePhone",             officePhone),
+                     ("CellPhone",              "cellPhone",               cellPhone),
+                     ("Fax",                    "fax",                     fax),
+                     ("Title",                  "title",                   title),
+                     ("Address1",               "address1",                address1),
+                     ("Address2",               "address2",                address2),
+                     ("City",                   "city",                    city),
+                     ("State",                  "state",                   state),
+                     ("Zip",                    "zip",                     zip),
+                     ("Country",                "country",                 country),
+                     ("TimeZone",               "timezone",                timezone),
+                     ("IncludeInCorrespondence", "includeInCorrespondence", includeInCorrespondence))
+
+    def unchanged(key, value):
+        if current is None or key not in current :
+            return False
+        if key == "includeInCorrespondence" :
+            return _as_bool(current.get(key)) == _as_bool(value)
+        return current.get(key) == value
+
+    return [{"op": "replace", "path": path, "value": value} for path, key, value in update_fields
+            if not unchanged(key, value)]
 
 
 #########################################################################
@@ -204,14 +776,16 @@ def get_contacts_for_account(access_token, tenant_id, account_number) -> json :
 # Returns:
 #    json with the response from the API
 #
+# Comments:
+#    Field values are sent as given; quotes, apostrophes and
+#    backslashes are preserved.
+#
 # See also:
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
 #
 # TODO:
 #    - Use the updatedOn and updatedBy fields
-#    - Clean up logging
-#    - Gracefully handle the apostrophe and backslash in strings
 #
 #########################################################################
 
@@ -220,67 +794,27 @@ def add_contact_to_account(access_token, tenant_id, account_number, first_name,
                            cellPhone, fax, title, address1, address2, city, state, zip,
                            country, updatedOn, updatedBy, includeInCorrespondence) -> json :
 
-    notes = notes.replace('"', '')
-    notes = notes.replace("'", '')
-
-    if len(language) < 2 :
-        language = 'en'
-
-    if len(timezone) < 4 :
-        timezone = 'America/Chicago'
-
     return_value = ''
+    contact_body = None
 
     try :
-        first_name = first_name.replace("\\", "\\\\")
-        last_name = last_name.replace("\\", "\\\\")
-        contact_body_string =  '{ ' + '"firstName" : "{}", '.format(first_name) + \
-                            '  "lastName"  : "{}", '.format(last_name) + \
-                            '  "language"  : "{}", '.format(language) + \
-                            '  "notes"  : "{}", '.format(notes) + \
-                            '  "email"  : "{}", '.format(email) + \
-                            '  "officePhone"  : "{}", '.format(officePhone) + \
-                            '  "cellPhone"  : "{}", '.format(cellPhone) + \
-                            '  "fax"  : "{}", '.format(fax) + \
-                            '  "title"  : "{}", '.format(title) + \
-                            '  "address1"  : "{}", '.format(address1) + \
-                            '  "address2"  : "{}", '.format(address2) + \
-                            '  "timezone"  : "{}", '.format(timezone) + \
-                            '  "IncludeInCorrespondence" : "{}" '.format(includeInCorrespondence) + \
-                            ' }'
-        contact_body = json.loads(contact_body_string)
-        contact_uri = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{tenant_id}/collectioncustomers/accountNumber/{account_number}/collectioncontacts"
-
-        contact_headers = {"Accept":"application/json", "X-Billtrust-Auth":access_token}
-
-        contact_response = requests.post(contact_uri, headers=contact_headers, json=contact_body)
-        contact_response.raise_for_status()
-        return_value = contact_response.json()
+        contact_body = _contact_body(first_name, last_name, language, timezone, notes, email,
+                                     officePhone, cellPhone, fax, title, address1, address2,
+                                     includeInCorrespondence)
+        contact_uri = _endpoints(tenant_id).contacts(account_number)
+
+        contact_headers = {**_JSON_HEADERS, "X-Billtrust-Auth":access_token}
 
-    except Exception as error:
-        frame = getframeinfo(currentframe())
-        filename = frame.filename
-        line = str(frame.lineno)
+        contact_response = _SESSION.post(contact_uri, headers=contact_headers, data=_dumps(contact_body))
+        contact_response.raise_for_status()
+        return_value = _json(contact_response)
+        _invalidate_contacts(tenant_id, account_number)
 
-        logging.error('\n===== INSERT CONTACT =====')
-        logging.error('   Failed to insert contact')
-        logging.error('   File: ' + filename)
-        logging.error('   Function: ' + __name__)
-        logging.error('   Line: ' + line)
-        logging.error('   Account: ' + account_number)
-        logging.error('   First Name: ' + first_name)
-        logging.error('   Last Name: ' + last_name)
-        logging.error('   Email: ' + email)
-        logging.error('\n')
-        logging.error(contact_body)
-        logging.error('\n')
-        logging.error(str(error))
-        logging.error('\n')
-        if len(return_value) > 0 :
-            logging.error(json.dumps(return_value, indent=3))
-        logging.error('----------------------------------------------------\n\n')
+    except Exception:
+        logger.exception('INSERT CONTACT failed account=%s first=%s last=%s email=%s body=%s',
+                         account_number, first_name, last_name, email, contact_body)
 
-    return contact_response.json()
+    return return_value
 
 
 
@@ -299,25 +833,43 @@ def add_contact_to_account(access_token, tenant_id, account_number, first_name,
 #    string with the internal Billtrust Contact Id if found or empty 
 #    string if not
 #
+# Comments:
+#    The contact list for each account is cached along with a name
+#    index. When the server supplies an ETag or Last-Modified header
+#    the list is revalidated with a conditional GET on each lookup;
+#    otherwise it is fetched once and reused. add_contact_to_account(),
+#    contact_update() and contact_delete() drop the cached entry for
+#    the account they change (see _invalidate_contacts()).
+#
 # See also:
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
 #
-# TODO:
-#    - Gracefully handle the apostrophe and backslash in strings
-#
 #########################################################################
 
 def contact_internalid_lookup(access_token, tenant_id, account_number, firstname, lastname) -> str :
     try:
-        contact_list = get_contacts_for_account(access_token, tenant_id, account_number)
+        cache_key = (tenant_id, account_number)
+        entry = _contact_index_cache.get(cache_key)
+
+        # Without validators the cached list cannot be revalidated
+        # cheaply, so it is used as is until a write clears it
+        if entry is None or entry["etag"] or entry["last_modified"] :
+            entry = _fetch_contacts(access_token, tenant_id, account_number)
 
-        for contact in contact_list:
-            if contact['firstName'] == firstname and contact['lastName'] == lastname :
-                return contact['id']
+        contact_index = entry["index"]
+        if contact_index is None :
+            contact_index = {}
+            for contact in entry["contacts"]:
+                # Keep the first match, as the old linear search did
+                contact_index.setdefault((contact['firstName'], contact['lastName']), contact['id'])
+            entry["index"] = contact_index
 
-    except Exception as error:
-        logging.warning('Failed to find contact internal id for Account Number: ' + account_number + ', First Name: ' + firstname + ', Last Name: ' + lastname)
+        return contact_index.get((firstname, lastname), '')
+
+    except Exception:
+        logger.warning('Failed to find contact internal id for Account Number: %s, First Name: %s, Last Name: %s',
+                       account_number, firstname, lastname)
 
     return ''
 
@@ -344,18 +896,15 @@ def contact_internalid_lookup(access_token, tenant_id, account_number, firstname
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
 #
-# TODO:
-#    - Gracefully handle the apostrophe and backslash in strings
-#
 #########################################################################
 
 def account_internalid_lookup(access_token, tenant_id, account_number) -> str :
     try:
-        accounts_uri = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{tenant_id}/customermasters/customernumber/{account_number}"
-        accounts_headers = {"Accept":"application/json", "Content-Type": "application/json", "X-Billtrust-Auth":access_token}
-        accounts_response = requests.get(accounts_uri, headers=accounts_headers)
+        accounts_uri = _endpoints(tenant_id).customer(account_number)
+        accounts_headers = {"X-Billtrust-Auth":access_token}
+        accounts_response = _SESSION.get(accounts_uri, headers=accounts_headers)
         accounts_response.raise_for_status()
-        accounts_json = accounts_response.json()
+        accounts_json = _json(accounts_response)
 
         this_tenant = accounts_json['tenantId']
         this_id = accounts_json['id']
@@ -363,8 +912,8 @@ def account_internalid_lookup(access_token, tenant_id, account_number) -> str :
 
         return this_id
 
-    except Exception as error:
-        logging.warning('Failed to find account internal id for Account Number: ' + account_number)
+    except Exception:
+        logger.warning('Failed to find account internal id for Account Number: %s', account_number)
 
 
     return ''
@@ -387,36 +936,19 @@ def account_internalid_lookup(access_token, tenant_id, account_number) -> str :
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
 #
-# TODO:
-#    - Gracefully handle the apostrophe and backslash in strings
-#
 #########################################################################
 
 def contact_delete(access_token, tenant_id, account_number, contact_id):
     try:
         
-        accounts_uri = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{tenant_id}/collectioncustomers/accountNumber/{account_number}/collectioncontacts/{contact_id}"
-        accounts_headers = {"Accept":"application/json", "Content-Type": "application/json", "X-Billtrust-Auth":access_token}
-        accounts_response = requests.delete(accounts_uri, headers=accounts_headers)
+        accounts_uri = _endpoints(tenant_id).contact(account_number, contact_id)
+        accounts_response = _send(_prepared("DELETE", access_token, accounts_uri))
         accounts_response.raise_for_status()
-        accounts_json = accounts_response.json()
+        _invalidate_contacts(tenant_id, account_number)
         return 
 
-    except Exception as error:
-        frame = getframeinfo(currentframe())
-        filename = frame.filename
-        line = str(frame.lineno)
-
-        logging.error('\n===== DELETE CONTACT =====')
-        logging.error('   Failed to delete contact')
-        logging.error('   File: ' + filename)
-        logging.error('   Function: ' + __name__)
-        logging.error('   Line: ' + line)
-        logging.error('   Account: ' + account_number)
-        logging.error('   ContactId: ' + contact_id)
-        logging.error(str(error))
-        logging.error('\n')
-        logging.error('----------------------------------------------------\n\n')
+    except Exception:
+        logger.exception('DELETE CONTACT failed account=%s contact=%s', account_number, contact_id)
 
     return 
 
@@ -455,15 +987,17 @@ def contact_delete(access_token, tenant_id, account_number, contact_id):
 # Comments:
 #    You may need to change field names to match your installation.
 #
+#    The contact is read first and only the fields that differ are
+#    sent. If nothing changed, no PATCH is issued and a copy of the
+#    current contact is returned.
+#
+#    Field values are sent as given; quotes, apostrophes and
+#    backslashes are preserved.
+#
 # See also:
 #    Billtrust Python Code Samples
 #    https://api-docs.aws-prod.billtrust.com/examples/python/
 #
-# TODO:
-#    - Gracefully handle the apostrophe and backslash in strings
-#    - Clean up logging
-#    - Update only fields that changed
-#
 #########################################################################
 
 def contact_update(access_token, tenant_id, account_number, contact_id, first_name, 
@@ -471,131 +1005,443 @@ def contact_update(access_token, tenant_id, account_number, contact_id, first_na
                            cellPhone, fax, title, address1, address2, city, state, zip,
                            country, updatedOn, updatedBy, includeInCorrespondence) -> json :
 
-    notes = notes.replace('"', '')
-    notes = notes.replace("'", '')
+    return_value = ''
 
-    if len(language) < 2 :
-        language = 'en'
+    try :
+        contact_list = get_contacts_for_account(access_token, tenant_id, account_number)
+        current = next((contact for contact in contact_list if contact['id'] == contact_id), None)
 
-    if len(timezone) < 4 :
-        timezone = 'America/Chicago'
+        update_body = _contact_update_body(first_name, last_name, language, timezone, notes, email,
+                                           officePhone, cellPhone, fax, title, address1, address2,
+                                           city, state, zip, country, includeInCorrespondence,
+                                           current)
+        if len(update_body) == 0 :
+            return dict(current)
 
-    try :
-        update_body_string =  \
-            '[{' + \
-            '"value" : "' + format(first_name) + '", ' + \
-            '"path" : "FirstName", ' + \
-            '"op" : "replace" ' + \
-            '}, ' + \
-            '{' + \
-            '"value" : "' + format(last_name) + '", ' + \
-            '"path" : "LastName", ' + \
-            '"op" : "replace" ' + \
-            '}, ' + \
-            '{' + \
-            '"value" : "' + format(language) + '", ' + \
-            '"path" : "Language", ' + \
-            '"op" : "replace"' + \
-            '}, ' + \
-            '{' + \
-            '"value" : "' + format(notes) + '", ' + \
-            '    "path" : "Notes", ' + \
-            '    "op" : "replace" ' + \
-            '  }, ' + \
-            '  {  ' + \
-            '    "value" : "' + format(email) + '", ' + \
-            '    "path" : "Email", ' + \
-            '    "op" : "replace" ' + \
-            '  }, ' + \
-            '  {  ' + \
-            '    "value" : "' + format(officePhone) + '", ' + \
-            '    "path" : "OfficePhone", ' + \
-            '    "op" : "replace" ' + \
-            '  }, ' + \
-            ' {' + \
-            '    "value" : "' + format(cellPhone) + '", ' + \
-            '    "path" : "CellPhone", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            ' {' + \
-            '    "value" : "' + format(fax) + '", ' + \
-            '    "path" : "Fax", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(title) + '", ' + \
-            '    "path" : "Title", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(address1) + '", ' + \
-            '    "path" : "Address1", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(address2) + '", ' + \
-            '    "path" : "Address2", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(city) + '", ' + \
-            '    "path" : "City", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(state) + '", ' + \
-            '    "path" : "State", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(zip) + '", ' + \
-            '    "path" : "Zip", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(country) + '", ' + \
-            '    "path" : "Country", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(timezone) + '", ' + \
-            '    "path" : "TimeZone", ' + \
-            '    "op" : "replace" ' + \
-            '},  ' + \
-            '  {  ' + \
-            '    "value" : "' + format(includeInCorrespondence) + '", ' + \
-            '    "path" : "IncludeInCorrespondence", ' + \
-            '    "op" : "replace" ' + \
-            '}]'
-
-        update_body = json.loads(update_body_string)
-        update_uri = f"https://arc-aegis.billtrust.com/collections/api/v1/tenants/{tenant_id}/collectioncustomers/accountNumber/{account_number}/collectioncontacts/{contact_id}"
-        update_headers = {"Accept":"application/json", "X-Billtrust-Auth":access_token}
-
-        return_value = ''
-    
-        update_response = requests.patch(update_uri, headers=update_headers, json=update_body)
+        update_uri = _endpoints(tenant_id).contact(account_number, contact_id)
+        update_response = _send(_prepared("PATCH", access_token, update_uri, update_body))
         update_response.raise_for_status()
-        return_value = update_response.json()
-
-    except Exception as error:
-        frame = getframeinfo(currentframe())
-        filename = frame.filename
-        line = str(frame.lineno)
-
-        logging.error('\n===== UPDATE CONTACT =====')
-        logging.error('   Failed to update contact')
-        logging.error('   File: ' + filename)
-        logging.error('   Function: ' + __name__)
-        logging.error('   Line: ' + line)
-        logging.error('   Account: ' + account_number)
-        logging.error('   First Name: ' + first_name)
-        logging.error('   Last Name: ' + last_name)
-        logging.error('   Email: ' + email)
-        logging.error(str(error))
-        logging.error('\n')
-        if len(return_value) > 0 :
-            logging.error(json.dumps(return_value, indent=3))
-        logging.error('----------------------------------------------------\n\n')
+        return_value = _json(update_response)
+        _invalidate_contacts(tenant_id, account_number)
+
+    except Exception:
+        logger.exception('UPDATE CONTACT failed account=%s contact=%s first=%s last=%s email=%s',
+                         account_number, contact_id, first_name, last_name, email)
+
+    return return_value
+
+
+#########################################################################
+#
+# Bulk variants
+#
+# The *_many() functions run the single-row functions above on a thread
+# pool. The threads share the session's connection pool and release the
+# GIL while waiting on the network, so a batch takes roughly as long as
+# its slowest calls rather than the sum of all of them. Keep workers at
+# or below _POOL_MAXSIZE.
+#
+#########################################################################
+
+
+#########################################################################
+#
+# Function: add_contact_to_account_many()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    contacts : list of tuples with the remaining arguments of
+#               add_contact_to_account(), starting with account_number
+#    workers : number of threads (int)
+#
+# Returns:
+#    list with the result of add_contact_to_account() for each row,
+#    in order
+#
+#########################################################################
+
+def add_contact_to_account_many(access_token, tenant_id, contacts, workers=16) -> list :
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda row: add_contact_to_account(access_token, tenant_id, *row),
+                                 contacts))
+
+
+#########################################################################
+#
+# Function: contact_update_many()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    updates : list of tuples with the remaining arguments of
+#              contact_update(), starting with account_number
+#    workers : number of threads (int)
+#
+# Returns:
+#    list with the result of contact_update() for each row, in order
+#
+#########################################################################
+
+def contact_update_many(access_token, tenant_id, updates, workers=16) -> list :
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda row: contact_update(access_token, tenant_id, *row),
+                                 updates))
+
+
+#########################################################################
+#
+# Function: contact_delete_many()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    deletions : list of (account_number, contact_id) tuples
+#    workers : number of threads (int)
+#
+# Returns:
+#    nothing
+#
+#########################################################################
+
+def contact_delete_many(access_token, tenant_id, deletions, workers=16):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda row: contact_delete(access_token, tenant_id, *row), deletions))
+
+    return
+
+
+#########################################################################
+#
+# Function: _chunks()
+#
+# Parameters:
+#    items : list to split (list)
+#    size : maximum length of each chunk (int)
+#
+# Returns:
+#    generator yielding consecutive slices of items
+#
+#########################################################################
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+#########################################################################
+#
+# Function: _account_exists()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    account_number : customer account number (not Billtrust accountid) (str)
+#
+# Returns:
+#    True if the account's contact list can be read, False if the
+#    server rejects it
+#
+#########################################################################
+
+def _account_exists(access_token, tenant_id, account_number) -> bool :
+    try :
+        _fetch_contacts(access_token, tenant_id, account_number)
+    except requests.HTTPError:
+        return False
+
+    return True
+
+
+#########################################################################
+#
+# Function: _add_contacts_one_by_one()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    account_number : customer account number (not Billtrust accountid) (str)
+#    contacts : list of dicts as for add_contacts_to_account_bulk()
+#
+# Returns:
+#    list with one result per contact, in order. A contact that could
+#    not be added, including one with missing or unexpected keys, gets
+#    an empty string.
+#
+#########################################################################
+
+def _add_contacts_one_by_one(access_token, tenant_id, account_number, contacts) -> list :
+    return_value = []
+
+    for contact in contacts:
+        try :
+            return_value.append(add_contact_to_account(access_token, tenant_id, account_number, **contact))
+        except Exception:
+            logger.exception('INSERT CONTACT failed account=%s contact=%s', account_number, contact)
+            return_value.append('')
+
+    return return_value
+
+
+#########################################################################
+#
+# Function: add_contacts_to_account_bulk()
+#
+# Parameters:
+#    access_token : access token for session (str)
+#    tenant_id : tenant id to query (str)
+#    account_number : customer account number (not Billtrust accountid) (str)
+#    contacts : list of dicts, each holding the keyword arguments of
+#               add_contact_to_account() from first_name onward
+#    chunk_size : maximum number of contacts per request (int)
+#
+# Returns:
+#    list with one result per contact, in input order. Contacts in a
+#    chunk that failed get an empty string. If the bulk response does
+#    not hold one item per contact, each contact in the chunk gets the
+#    whole response.
+#
+# Comments:
+#    Posts the contacts in chunks to the collectioncontacts/bulk
+#    endpoint, turning N round-trips into N / chunk_size. If the server
+#    does not offer that endpoint, the contacts are added one at a time
+#    with add_contact_to_account() instead, and later calls for the
+#    same tenant skip the bulk attempt. A 405 means the endpoint is
+#    missing; a 404 only counts when the account's contact list can be
+#    read, since otherwise it just means the account was not found.
+#
+#########################################################################
+
+def add_contacts_to_account_bulk(access_token, tenant_id, account_number, contacts, chunk_size=500) -> list :
+    return_value = []
+    bulk_uri = _endpoints(tenant_id).contacts_bulk(account_number)
+    bulk_headers = {**_JSON_HEADERS, "X-Billtrust-Auth":access_token}
+
+    for chunk in _chunks(contacts, chunk_size):
+        if tenant_id in _bulk_contacts_unsupported :
+            return_value.extend(_add_contacts_one_by_one(access_token, tenant_id, account_number, chunk))
+            continue
+
+        try :
+            bulk_body = [_contact_body(contact['first_name'], contact['last_name'], contact['language'],
+                                       contact['timezone'], contact['notes'], contact['email'],
+                                       contact['officePhone'], contact['cellPhone'], contact['fax'],
+                                       contact['title'], contact['address1'], contact['address2'],
+                                       contact['includeInCorrespondence'])
+                         for contact in chunk]
+            bulk_response = _SESSION.post(bulk_uri, headers=bulk_headers, data=_dumps(bulk_body))
+
+            if bulk_response.status_code == 405 or \
+               (bulk_response.status_code == 404 and _account_exists(access_token, tenant_id, account_number)) :
+                _bulk_contacts_unsupported.add(tenant_id)
+                return_value.extend(_add_contacts_one_by_one(access_token, tenant_id, account_number, chunk))
+                continue
+
+            bulk_response.raise_for_status()
+            _invalidate_contacts(tenant_id, account_number)
+
+            bulk_json = _json(bulk_response)
+            if isinstance(bulk_json, list) and len(bulk_json) == len(chunk) :
+                return_value.extend(bulk_json)
+            else :
+                # No per-contact results; give each contact the chunk's response
+                return_value.extend([bulk_json] * len(chunk))
+
+        except Exception:
+            logger.exception('BULK INSERT CONTACT failed account=%s contacts=%s',
+                             account_number, len(chunk))
+            return_value.extend([''] * len(chunk))
 
     return return_value
+
+
+#########################################################################
+#
+# Async variants
+#
+# The functions below mirror add_contact_to_account(), contact_update()
+# and contact_delete() for bulk jobs. They take an HTTP/2 client from
+# new_async_session(), which multiplexes many in-flight requests over a
+# handful of TLS connections to the same host. They raise on failure
+# instead of logging so that run_many() can hand the exception back to
+# the caller for that row.
+#
+# Example:
+#
+#    async def sync_contacts(access_token, tenant_id, rows):
+#        async with new_async_session() as session:
+#            return await run_many(add_contact_to_account_async(session, access_token,
+#                                                               tenant_id, *row)
+#                                  for row in rows)
+#
+#    results = asyncio.run(sync_contacts(access_token, tenant_id, rows))
+#
+#########################################################################
+
+
+#########################################################################
+#
+# Function: new_async_session()
+#
+# Parameters:
+#    max_connections : maximum number of open connections (int)
+#
+# Returns:
+#    httpx.AsyncClient to pass to the *_async functions
+#
+# Comments:
+#    Requires the httpx package with HTTP/2 support, i.e.
+#    pip install "httpx[http2]"
+#
+#########################################################################
+
+def new_async_session(max_connections=8) -> "httpx.AsyncClient" :
+    if httpx is None :
+        raise ImportError("httpx is required for the async functions")
+
+    limits = httpx.Limits(max_connections=max_connections,
+                          max_keepalive_connections=max_connections,
+                          keepalive_expiry=60)
+    return httpx.AsyncClient(http2=True, limits=limits, timeout=30, verify=_SSL_CONTEXT,
+                             headers=_JSON_ACCEPT)
+
+
+#########################################################################
+#
+# Function: _log_http_version()
+#
+# Parameters:
+#    response : first httpx.Response received on the async path
+#
+# Returns:
+#    nothing
+#
+# Comments:
+#    Logs the negotiated protocol once at debug level so it is easy to
+#    confirm that HTTP/2 is actually in use.
+#
+#########################################################################
+
+_http_version_logged = False
+
+def _log_http_version(response):
+    global _http_version_logged
+
+    if not _http_version_logged :
+        _http_version_logged = True
+        logger.debug('Async client negotiated %s', response.http_version)
+
+    return
+
+
+#########################################################################
+#
+# Function: run_many()
+#
+# Parameters:
+#    coros : iterable of coroutines to run
+#    limit : maximum number of coroutines in flight at once (int)
+#
+# Returns:
+#    list with the result of each coroutine, in order. A coroutine that
+#    failed has its exception in its slot instead of a result.
+#
+#########################################################################
+
+async def run_many(coros, limit=32) -> list :
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(bounded(coro) for coro in coros), return_exceptions=True)
+
+
+#########################################################################
+#
+# Function: add_contact_to_account_async()
+#
+# Parameters:
+#    session : session from new_async_session()
+#    Remaining parameters as add_contact_to_account()
+#
+# Returns:
+#    json with the response from the API
+#
+#########################################################################
+
+async def add_contact_to_account_async(session, access_token, tenant_id, account_number, first_name,
+                                       last_name, language, timezone, notes, email, officePhone,
+                                       cellPhone, fax, title, address1, address2, city, state, zip,
+                                       country, updatedOn, updatedBy, includeInCorrespondence) -> json :
+
+    contact_body = _contact_body(first_name, last_name, language, timezone, notes, email,
+                                 officePhone, cellPhone, fax, title, address1, address2,
+                                 includeInCorrespondence)
+    contact_uri = _endpoints(tenant_id).contacts(account_number)
+    contact_headers = {**_JSON_HEADERS, "X-Billtrust-Auth":access_token}
+
+    contact_response = await session.post(contact_uri, headers=contact_headers, content=_dumps(contact_body))
+    _log_http_version(contact_response)
+    contact_response.raise_for_status()
+    _invalidate_contacts(tenant_id, account_number)
+
+    return _json(contact_response)
+
+
+#########################################################################
+#
+# Function: contact_update_async()
+#
+# Parameters:
+#    session : session from new_async_session()
+#    Remaining parameters as contact_update()
+#
+# Returns:
+#    json with the response from the API
+#
+#########################################################################
+
+async def contact_update_async(session, access_token, tenant_id, account_number, contact_id, first_name,
+                               last_name, language, timezone, notes, email, officePhone,
+                               cellPhone, fax, title, address1, address2, city, state, zip,
+                               country, updatedOn, updatedBy, includeInCorrespondence) -> json :
+
+    update_body = _contact_update_body(first_name, last_name, language, timezone, notes, email,
+                                       officePhone, cellPhone, fax, title, address1, address2,
+                                       city, state, zip, country, includeInCorrespondence)
+    update_uri = _endpoints(tenant_id).contact(account_number, contact_id)
+    update_headers = {**_JSON_HEADERS, "X-Billtrust-Auth":access_token}
+
+    update_response = await session.patch(update_uri, headers=update_headers, content=_dumps(update_body))
+    _log_http_version(update_response)
+    update_response.raise_for_status()
+    _invalidate_contacts(tenant_id, account_number)
+
+    return _json(update_response)
+
+
+#########################################################################
+#
+# Function: contact_delete_async()
+#
+# Parameters:
+#    session : session from new_async_session()
+#    Remaining parameters as contact_delete()
+#
+# Returns:
+#    nothing
+#
+#########################################################################
+
+async def contact_delete_async(session, access_token, tenant_id, account_number, contact_id):
+    delete_uri = _endpoints(tenant_id).contact(account_number, contact_id)
+    delete_headers = {"X-Billtrust-Auth":access_token}
+
+    delete_response = await session.delete(delete_uri, headers=delete_headers)
+    _log_http_version(delete_response)
+    delete_response.raise_for_status()
+    _invalidate_contacts(tenant_id, account_number)
+
+    return